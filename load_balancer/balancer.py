@@ -1,12 +1,213 @@
+import heapq
+import itertools
 import threading
+import time
+from multiprocessing import shared_memory
 from typing import List, Dict, Optional
 
+class BackpressureError(Exception):
+    """Raised by acquire_server when the wait queue is full."""
+
+
+class AIMDLimit:
+    """
+    Concurrency limit adjusted from latency samples: additive increase while
+    latency stays under target, multiplicative decrease when it exceeds it.
+    """
+    def __init__(self, initial: int, target_latency: float, min_limit: int = 1,
+                 max_limit: int = 1000, backoff: float = 0.9):
+        self.limit = float(initial)
+        self.target_latency = target_latency
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.backoff = backoff
+
+    def on_sample(self, latency: float):
+        # Callers hold the server lock
+        if latency > self.target_latency:
+            self.limit = max(self.min_limit, self.limit * self.backoff)
+        else:
+            # Grows by about one per limit-many requests
+            self.limit = min(self.max_limit, self.limit + 1 / self.limit)
+
+    def value(self) -> int:
+        return int(self.limit)
+
+
+class OutlierDetector:
+    """
+    Periodically ejects servers whose error rate or mean latency stands out
+    from the rest of the pool. Each consecutive ejection of a server doubles
+    its ejection time up to max_ejection_time, and no more than
+    max_ejection_fraction of the pool is ejected at once.
+    """
+    def __init__(self, interval: float = 10.0, min_requests: int = 10,
+                 error_rate_margin: float = 0.2, latency_factor: float = 3.0,
+                 base_ejection_time: float = 1.0, max_ejection_time: float = 60.0,
+                 max_ejection_fraction: float = 0.5):
+        self.interval = interval
+        self.min_requests = min_requests
+        self.error_rate_margin = error_rate_margin
+        self.latency_factor = latency_factor
+        self.base_ejection_time = base_ejection_time
+        self.max_ejection_time = max_ejection_time
+        self.max_ejection_fraction = max_ejection_fraction
+        self.next_check = time.monotonic() + interval
+        self.lock = threading.Lock()
+
+    def maybe_evaluate(self, servers):
+        """
+        Evaluate if the interval has passed; concurrent callers skip instead of
+        waiting. servers may be a live view; it is only copied when evaluating.
+        Returns the times at which the new ejections end.
+        """
+        now = time.monotonic()
+        if now < self.next_check or not self.lock.acquire(blocking=False):
+            return []
+        try:
+            self.next_check = now + self.interval
+            return self.evaluate(servers, now)
+        finally:
+            self.lock.release()
+
+    def evaluate(self, servers, now):
+        """Eject outliers among servers. Returns the times at which the new ejections end."""
+        servers = list(servers)
+        reinstated_at = []
+        samples = []
+        for server in servers:
+            with server.lock:
+                requests, errors, latency_total = server.requests, server.errors, server.latency_total
+                server.requests = server.errors = 0
+                server.latency_total = 0.0
+            if requests >= self.min_requests:
+                samples.append((server, errors / requests, latency_total / requests))
+        if len(samples) < 2:
+            return reinstated_at  # Nothing to compare against
+
+        mean_error_rate = sum(error_rate for _, error_rate, _ in samples) / len(samples)
+        latencies = sorted(latency for _, _, latency in samples)
+        median_latency = latencies[len(latencies) // 2]
+        ejected = sum(1 for server in servers if now < server.ejected_until)
+        max_ejected = int(len(servers) * self.max_ejection_fraction)
+
+        for server, error_rate, latency in samples:
+            if now < server.ejected_until:
+                continue
+            outlier = (error_rate > mean_error_rate + self.error_rate_margin or
+                       (median_latency > 0 and latency > median_latency * self.latency_factor))
+            with server.lock:
+                if outlier and ejected < max_ejected:
+                    duration = min(self.max_ejection_time,
+                                   self.base_ejection_time * 2 ** server.ejection_count)
+                    server.ejection_count += 1
+                    server.ejected_until = now + duration
+                    # Ramp back up through slow start once the ejection ends
+                    server.warm_since = server.ejected_until
+                    reinstated_at.append(server.ejected_until)
+                    ejected += 1
+                elif not outlier and server.ejection_count:
+                    server.ejection_count -= 1
+        return reinstated_at
+
+
+class SharedConnectionCounts:
+    """
+    Connection counters shared by balancer replicas running in different processes.
+    The shared block is a num_slots x len(server_names) array of int64. Each
+    replica writes only its own slot (row), so updates need no cross-process
+    lock; readers sum a server's column over all slots. Counts of servers not
+    in server_names stay local to the replica. Attaching zeroes the replica's
+    own slot, so a restarted replica does not inherit counts it cannot undo.
+    """
+    def __init__(self, name, server_names, num_slots, slot, create=False):
+        if not 0 <= slot < num_slots:
+            raise ValueError("slot must be in [0, num_slots)")
+        self.index = {server: i for i, server in enumerate(server_names)}
+        self.num_servers = len(server_names)
+        self.num_slots = num_slots
+        self.offset = slot * self.num_servers
+        self.shm = shared_memory.SharedMemory(
+            name=name, create=create, size=8 * num_slots * self.num_servers)
+        self.counts = self.shm.buf.cast('q')
+        if create:
+            for i in range(num_slots * self.num_servers):
+                self.counts[i] = 0
+        else:
+            # Only this replica writes its slot
+            for i in range(self.offset, self.offset + self.num_servers):
+                self.counts[i] = 0
+
+    def add(self, server, delta):
+        """Adjust this replica's count. Callers serialize per server (Server.lock)."""
+        i = self.index.get(server)
+        if i is not None:
+            self.counts[self.offset + i] += delta
+
+    def total(self, server):
+        """Connections to server across all replicas, or None if it is not shared."""
+        i = self.index.get(server)
+        if i is None:
+            return None
+        counts = self.counts
+        return sum(counts[slot * self.num_servers + i] for slot in range(self.num_slots))
+
+    def close(self):
+        self.counts.release()
+        self.shm.close()
+
+    def unlink(self):
+        """Free the shared block; call once, from the process that created it."""
+        self.shm.unlink()
+
+
 class Server:
-    def __init__(self, name):
+    def __init__(self, name, max_connections=None, target_latency=None, warm_since=None):
         self.name = name 
         self.connections = 0
         self.healthy = True
+        self.max_connections = max_connections
+        self.limiter = None
+        if max_connections is not None and target_latency is not None:
+            self.limiter = AIMDLimit(max_connections, target_latency)
+        # Start of the slow-start ramp; None means fully warm
+        self.warm_since = warm_since
+        self.ejected_until = 0.0
+        self.ejection_count = 0
+        # Outcomes since the last outlier evaluation
+        self.requests = 0
+        self.errors = 0
+        self.latency_total = 0.0
         self.lock = threading.Lock()  
+
+    def is_available(self, now):
+        return self.healthy and now >= self.ejected_until
+
+    def effective_weight(self, now, slow_start_window, min_weight):
+        """Fraction of full traffic share, ramping linearly over the slow-start window."""
+        if self.warm_since is None or not slow_start_window:
+            return 1.0
+        progress = (now - self.warm_since) / slow_start_window
+        if progress >= 1:
+            self.warm_since = None
+            return 1.0
+        return max(min_weight, progress)
+
+    def has_capacity(self):
+        """Whether another connection fits under the (possibly adaptive) limit."""
+        if self.max_connections is None:
+            return True
+        limit = self.limiter.value() if self.limiter else self.max_connections
+        return self.connections < limit
+
+
+class Waiter:
+    """A caller parked in acquire_server until a connection slot is handed to it."""
+    def __init__(self, algorithm):
+        self.algorithm = algorithm
+        self.event = threading.Event()
+        self.server = None
+        self.cancelled = False
         
 class RWLock:
     def __init__(self):
@@ -65,17 +266,50 @@ class RWLock:
     
 class ThreadSafeLoadBalancer:
 
-    def __init__(self, servers):
+    def __init__(self, servers, max_connections=None, max_queue_size=100,
+                 target_latency=None, slow_start_window=0.0, min_weight=0.1,
+                 outlier_detector=None, shared_counts=None):
+        # max_connections=None keeps the original unbounded behaviour.
+        # target_latency turns max_connections into the starting point of an AIMD limit.
+        self.max_connections = max_connections
+        self.max_queue_size = max_queue_size
+        self.target_latency = target_latency
+        # Added or recovered servers ramp from min_weight to full share over slow_start_window seconds
+        self.slow_start_window = slow_start_window
+        self.min_weight = min_weight
+        self.outlier_detector = outlier_detector
+        # Cluster-wide counts for least-connections; limits stay per replica
+        self.shared_counts = shared_counts
+
         self.servers = {}
         self.servers_list = []
         for server in servers:
-            self.servers[server] = Server(server)
+            self.servers[server] = self._new_server(server)
             self.servers_list.append(server)
 
         self.rr_next_index = 0
 
         self.server_collection_lock = RWLock()
         self.rr_lock = threading.RLock()
+
+        # Waiters ordered by (priority, arrival); cancelled entries are skipped lazily
+        self.admission_lock = threading.Lock()
+        self.wait_queue = []
+        self.queued = 0
+        self.wait_seq = itertools.count()
+
+    def _new_server(self, server, warm_since=None):
+        return Server(server, self.max_connections, self.target_latency, warm_since)
+
+    def _score(self, server_obj, now):
+        """Least-connections score: active connections scaled up while warming."""
+        weight = server_obj.effective_weight(now, self.slow_start_window, self.min_weight)
+        connections = None
+        if self.shared_counts:
+            connections = self.shared_counts.total(server_obj.name)
+        if connections is None:
+            connections = server_obj.connections
+        return (connections + 1) / weight
         
     def get_server(self, algorithm):
         with self.server_collection_lock.read_lock():
@@ -89,41 +323,142 @@ class ThreadSafeLoadBalancer:
                 raise ValueError(f"Unsupported algorithm: {algorithm}")
            
     def _get_rr_server(self):
+        # Skip unhealthy and ejected servers, as _pick_available does
+        now = time.monotonic()
         with self.rr_lock:
-            server_idx = self.rr_next_index % len(self.servers_list)
-            server = self.servers_list[server_idx]
-            self.rr_next_index = (server_idx + 1) % len(self.servers_list)  
-            return server
+            count = len(self.servers_list)
+            start = self.rr_next_index % count
+            server_idx = start
+            for offset in range(count):
+                idx = (start + offset) % count
+                if self.servers[self.servers_list[idx]].is_available(now):
+                    server_idx = idx
+                    break
+            # If no server is available, keep the plain rotation
+            self.rr_next_index = (server_idx + 1) % count  
+            return self.servers_list[server_idx]
 
     def _get_lc_server(self):
-        # Find server with least connections
-        min_connections = float('inf')
+        # Find server with least connections, weighted down during slow start
+        min_score = float('inf')
         selected_server = None
+        now = time.monotonic()
         
         for server_name in self.servers_list:
             server = self.servers[server_name]
-            if server.healthy:
+            if server.is_available(now):
                 with server.lock:
-                    if server.connections < min_connections:
-                        min_connections = server.connections
+                    score = self._score(server, now)
+                    if score < min_score:
+                        min_score = score
                         selected_server = server_name
         
         # If no healthy server found, return first available
         if selected_server is None and self.servers_list:
             selected_server = self.servers_list[0]
-            return selected_server
+        return selected_server
+
+    def acquire_server(self, algorithm="least_connections", timeout=None, priority=0):
+        """
+        Pick a server that is under its connection limit and record a connection to it.
+        If every healthy server is full, wait in a priority-then-FIFO queue (lower
+        priority value first) until record_disconnection frees a slot. Raises
+        BackpressureError at once if the queue is full, and TimeoutError if no slot
+        frees up within timeout. Pair each call with record_disconnection.
+        """
+        if algorithm not in ("round_robin", "least_connections"):
+            raise ValueError(f"Unsupported algorithm: {algorithm}")
+
+        with self.server_collection_lock.read_lock():
+            with self.admission_lock:
+                # Only take a slot directly if nobody is already waiting for one
+                if not self.queued:
+                    server_obj = self._pick_available(algorithm)
+                    if server_obj is not None:
+                        self._connect(server_obj)
+                        return server_obj.name
+                if self.queued >= self.max_queue_size:
+                    raise BackpressureError("Wait queue is full")
+                waiter = Waiter(algorithm)
+                heapq.heappush(self.wait_queue, (priority, next(self.wait_seq), waiter))
+                self.queued += 1
+
+        if not waiter.event.wait(timeout):
+            with self.admission_lock:
+                # A slot may have been handed over just as the wait timed out
+                if waiter.server is None:
+                    waiter.cancelled = True
+                    self.queued -= 1
+                    raise TimeoutError("No server available within timeout")
+        return waiter.server
+
+    def _pick_available(self, algorithm):
+        """Healthy server with spare capacity, or None. Caller holds admission_lock."""
+        candidates = [self.servers[name] for name in self.servers_list]
+        now = time.monotonic()
+        if algorithm == "round_robin":
+            with self.rr_lock:
+                count = len(candidates)
+                for offset in range(count):
+                    idx = (self.rr_next_index + offset) % count
+                    server_obj = candidates[idx]
+                    if server_obj.is_available(now) and server_obj.has_capacity():
+                        self.rr_next_index = (idx + 1) % count
+                        return server_obj
+            return None
+
+        selected = None
+        min_score = float('inf')
+        for server_obj in candidates:
+            if server_obj.is_available(now) and server_obj.has_capacity():
+                score = self._score(server_obj, now)
+                if score < min_score:
+                    min_score = score
+                    selected = server_obj
+        return selected
+
+    def _connect(self, server_obj):
+        with server_obj.lock:
+            server_obj.connections += 1
+            if self.shared_counts:
+                self.shared_counts.add(server_obj.name, 1)
+
+    def _dispatch_waiters(self):
+        """Hand free slots to queued callers in priority-then-FIFO order."""
+        # Checking the queue under admission_lock pairs with acquire_server's
+        # check-then-enqueue, so a slot freed concurrently is never missed
+        with self.server_collection_lock.read_lock():
+            with self.admission_lock:
+                while self.wait_queue:
+                    _, _, waiter = self.wait_queue[0]
+                    if waiter.cancelled:
+                        heapq.heappop(self.wait_queue)
+                        continue
+                    server_obj = self._pick_available(waiter.algorithm)
+                    if server_obj is None:
+                        break
+                    heapq.heappop(self.wait_queue)
+                    self.queued -= 1
+                    self._connect(server_obj)
+                    waiter.server = server_obj.name
+                    waiter.event.set()
         
     def add_server(self, server):
         with self.server_collection_lock.write_lock(): 
             if server not in self.servers:
-                self.servers[server] = Server(server)
+                self.servers[server] = self._new_server(server, warm_since=time.monotonic())
                 self.servers_list.append(server)
+        self._dispatch_waiters()
 
     def remove_server(self, server):
         with self.server_collection_lock.write_lock(): 
             if server in self.servers:
-                del self.servers[server]
+                server_obj = self.servers.pop(server)
                 self.servers_list.remove(server) 
+                # Later disconnections from it are ignored, so drop its share now
+                if self.shared_counts:
+                    with server_obj.lock:
+                        self.shared_counts.add(server, -server_obj.connections)
                 return True
             return False
 
@@ -134,12 +469,43 @@ class ThreadSafeLoadBalancer:
         if server_obj:
             with server_obj.lock:
                 server_obj.connections += 1  
+                if self.shared_counts:
+                    self.shared_counts.add(server, 1)
 
-    def record_disconnection(self, server):
+    def record_disconnection(self, server, latency=None, success=True):
+        """
+        Record a closed connection. latency (seconds) feeds the adaptive limit,
+        and latency and success feed outlier detection, when enabled.
+        """
         server_obj = self.servers.get(server)
         if server_obj:
             with server_obj.lock:
+                if self.shared_counts and server_obj.connections > 0:
+                    self.shared_counts.add(server, -1)
                 server_obj.connections = max(0, server_obj.connections - 1)  
+                server_obj.requests += 1
+                if not success:
+                    server_obj.errors += 1
+                if latency is not None:
+                    server_obj.latency_total += latency
+                    if server_obj.limiter:
+                        server_obj.limiter.on_sample(latency)
+            if self.outlier_detector:
+                for reinstated_at in self.outlier_detector.maybe_evaluate(self.servers.values()):
+                    self._schedule_dispatch(reinstated_at)
+            # A freed slot needs a dispatch; without limits, only queued callers do
+            if server_obj.max_connections is not None or self.wait_queue:
+                self._dispatch_waiters()
+
+    def _schedule_dispatch(self, at):
+        """
+        Dispatch waiters at time at (time.monotonic()), e.g. when an ejection
+        ends. Scheduled whatever the limits, since callers also queue while
+        every server is unhealthy or ejected.
+        """
+        timer = threading.Timer(max(0.0, at - time.monotonic()), self._dispatch_waiters)
+        timer.daemon = True
+        timer.start()
 
     def get_server_stats(self) -> Dict[str, int]:
         """Return current connection count for all servers."""
@@ -154,7 +520,11 @@ class ThreadSafeLoadBalancer:
         server_obj = self.servers.get(server)
         if server_obj:
             with server_obj.lock:
+                if healthy and not server_obj.healthy:
+                    server_obj.warm_since = time.monotonic()
                 server_obj.healthy = healthy
+            if healthy:
+                self._dispatch_waiters()
 
     def get_healthy_servers(self) -> List[str]:
         """Return list of currently healthy servers."""
@@ -1,3 +1,8 @@
+import concurrent.futures
+import multiprocessing
+import random
+import threading
+import time
 
 # Test the corrected implementation
 def test_corrected_load_balancer():
@@ -47,5 +52,307 @@ def test_corrected_load_balancer():
         print(f"Request {i+1}: {server}")
 
 
+def test_acquire_server_limits():
+    print("\n=== Connection Limit Test ===\n")
+
+    lb = ThreadSafeLoadBalancer(["server1", "server2"], max_connections=1, max_queue_size=1)
+    first = lb.acquire_server()
+    second = lb.acquire_server()
+    assert {first, second} == {"server1", "server2"}
+    print("Both servers at their limit:", lb.get_server_stats())
+
+    try:
+        lb.acquire_server(timeout=0.05)
+        assert False, "Should have raised TimeoutError"
+    except TimeoutError:
+        print("Waiter timed out as expected")
+
+    # A parked waiter is handed the slot freed by record_disconnection
+    result = []
+    waiter = threading.Thread(target=lambda: result.append(lb.acquire_server(timeout=5)))
+    waiter.start()
+    time.sleep(0.05)
+    try:
+        lb.acquire_server(timeout=5)
+        assert False, "Should have raised BackpressureError"
+    except BackpressureError:
+        print("Rejected fast with a full wait queue")
+    lb.record_disconnection(first)
+    waiter.join()
+    assert result == [first]
+    print(f"Waiter woken with {result[0]}")
+
+    # Higher priority (lower value) waiters are served first
+    order = []
+    lb = ThreadSafeLoadBalancer(["server1"], max_connections=1, max_queue_size=10)
+    held = lb.acquire_server()
+    threads = []
+    for priority in [5, 1, 3]:
+        thread = threading.Thread(
+            target=lambda p: (lb.acquire_server(timeout=5, priority=p), order.append(p),
+                              lb.record_disconnection("server1")),
+            args=(priority,))
+        thread.start()
+        threads.append(thread)
+        time.sleep(0.02)
+    lb.record_disconnection(held)
+    for thread in threads:
+        thread.join()
+    assert order == [1, 3, 5]
+    print(f"Priority order: {order}")
+
+
+def test_slow_start_and_outlier_ejection():
+    print("\n=== Slow Start Test ===\n")
+
+    lb = ThreadSafeLoadBalancer(["server1", "server2"], slow_start_window=0.5)
+    for _ in range(5):
+        lb.record_connection("server1")
+        lb.record_connection("server2")
+    lb.add_server("server3")
+    # A cold server is not flooded just because it has no connections
+    picks = [lb.get_server("least_connections") for _ in range(3)]
+    print(f"Picks right after adding server3: {picks}")
+    assert "server3" not in picks
+    time.sleep(0.5)
+    assert lb.get_server("least_connections") == "server3"
+    print("server3 receives traffic once warm")
+
+    print("\n=== Outlier Ejection Test ===\n")
+
+    detector = OutlierDetector(interval=0.05, min_requests=5, base_ejection_time=0.2,
+                               max_ejection_fraction=0.25)
+    servers = ["server1", "server2", "server3", "server4"]
+    lb = ThreadSafeLoadBalancer(servers, outlier_detector=detector)
+    for name in servers:
+        for _ in range(10):
+            lb.record_connection(name)
+            # server3 fails every request, server4 is slow; only one may be ejected
+            lb.record_disconnection(name, latency=0.5 if name == "server4" else 0.01,
+                                    success=name != "server3")
+    time.sleep(0.05)
+    lb.record_connection("server1")
+    lb.record_disconnection("server1", latency=0.01)
+    ejected = [name for name in servers if lb.servers[name].ejected_until > time.monotonic()]
+    print(f"Ejected servers: {ejected}")
+    assert len(ejected) == 1
+    picks = {lb.get_server("least_connections") for _ in range(10)}
+    assert ejected[0] not in picks
+    picks = [lb.get_server("round_robin") for _ in range(6)]
+    print(f"Round robin picks: {picks}")
+    assert ejected[0] not in picks and set(picks) == set(servers) - {ejected[0]}
+
+    assert lb.servers[ejected[0]].ejection_count == 1
+
+    # Each consecutive ejection doubles the ejection time, up to max_ejection_time
+    detector = OutlierDetector(base_ejection_time=0.1, max_ejection_time=0.3, min_requests=5)
+    pool = [Server(name) for name in servers]
+    durations = []
+    now = time.monotonic()
+    for _ in range(3):
+        for server in pool:
+            server.requests = 10
+            server.errors = 10 if server.name == "server3" else 0
+        detector.evaluate(pool, now)
+        durations.append(round(pool[2].ejected_until - now, 6))
+        now = pool[2].ejected_until
+    print(f"Consecutive ejection times: {durations}")
+    assert durations == [0.1, 0.2, 0.3]
+    assert pool[2].ejection_count == 3
+
+    print("\n=== Ejection Expiry Test ===\n")
+
+    # A caller queued while every remaining server is full gets the ejected one when it returns
+    detector = OutlierDetector(interval=0.05, min_requests=5, base_ejection_time=0.2,
+                               max_ejection_fraction=0.25)
+    lb = ThreadSafeLoadBalancer(servers, max_connections=1, outlier_detector=detector)
+    for name in servers:
+        for _ in range(5):
+            lb.record_connection(name)
+            lb.record_disconnection(name, latency=0.01, success=name != "server3")
+    time.sleep(0.05)
+    lb.record_connection("server1")
+    lb.record_disconnection("server1", latency=0.01)
+    assert lb.servers["server3"].ejected_until > time.monotonic()
+    held = {lb.acquire_server(timeout=0.1) for _ in range(3)}
+    assert held == {"server1", "server2", "server4"}
+    start_time = time.monotonic()
+    server = lb.acquire_server(timeout=1.0)
+    waited = time.monotonic() - start_time
+    print(f"Queued caller got {server} after {waited:.2f}s")
+    assert server == "server3" and waited < 0.5
+
+    # Without connection limits, callers queue only while no server is available
+    detector = OutlierDetector(interval=0.05, min_requests=5, base_ejection_time=0.2)
+    lb = ThreadSafeLoadBalancer(["a", "b"], outlier_detector=detector)
+    for name in ["a", "b"]:
+        for _ in range(5):
+            lb.record_connection(name)
+            lb.record_disconnection(name, latency=0.01, success=name != "b")
+    time.sleep(0.05)
+    lb.record_connection("a")
+    lb.record_disconnection("a", latency=0.01)
+    assert lb.servers["b"].ejected_until > time.monotonic()
+    lb.set_server_healthy("a", False)
+    start_time = time.monotonic()
+    server = lb.acquire_server(timeout=1.0)
+    waited = time.monotonic() - start_time
+    print(f"Unlimited balancer: queued caller got {server} after {waited:.2f}s")
+    assert server == "b" and waited < 0.5
+
+
+def test_shared_connection_counts(num_replicas=8, duration=1.0):
+    """Load imbalance across servers with independent vs shared-state replicas."""
+    print("\n=== Shared Connection Counts Test ===\n")
+
+    servers = ["server1", "server2", "server3", "server4"]
+
+    def replica(slot, shared_selection, block_name, stop):
+        # Every replica reports into the shared block so the parent can measure real load
+        observed = SharedConnectionCounts(block_name, servers, num_replicas, slot)
+        lb = ThreadSafeLoadBalancer(servers,
+                                    shared_counts=observed if shared_selection else None)
+        rand = random.Random(slot)
+        active = []
+        while not stop.is_set():
+            now = time.monotonic()
+            for server, end in [item for item in active if item[1] <= now]:
+                active.remove((server, end))
+                lb.record_disconnection(server)
+                if not shared_selection:
+                    observed.add(server, -1)
+            if len(active) < 2:
+                server = lb.get_server("least_connections")
+                lb.record_connection(server)
+                if not shared_selection:
+                    observed.add(server, 1)
+                active.append((server, now + rand.uniform(0.005, 0.05)))
+            time.sleep(0.001)
+        observed.close()
+
+    # Removing a server takes its connections out of the shared count
+    block_name = f"lb_counts_remove_{time.monotonic_ns()}"
+    counts = SharedConnectionCounts(block_name, servers, 1, 0, create=True)
+    lb = ThreadSafeLoadBalancer(servers, shared_counts=counts)
+    for _ in range(3):
+        lb.record_connection("server1")
+    assert counts.total("server1") == 3
+    lb.remove_server("server1")
+    lb.record_disconnection("server1")
+    assert counts.total("server1") == 0
+    lb.add_server("server1")
+    lb.record_connection("server1")
+    assert counts.total("server1") == 1
+    counts.close()
+    counts.unlink()
+    print("Shared count cleared on remove_server")
+
+    # A replica restarting on its slot starts from zero instead of the stale counts
+    block_name = f"lb_counts_reattach_{time.monotonic_ns()}"
+    owner = SharedConnectionCounts(block_name, servers, 2, 0, create=True)
+    other = SharedConnectionCounts(block_name, servers, 2, 1)
+    crashed = SharedConnectionCounts(block_name, servers, 2, 0)
+    other.add("server2", 2)
+    for _ in range(5):
+        crashed.add("server1", 1)
+    crashed.close()
+    restarted = SharedConnectionCounts(block_name, servers, 2, 0)
+    assert restarted.total("server1") == 0 and restarted.total("server2") == 2
+    lb = ThreadSafeLoadBalancer(servers, shared_counts=restarted)
+    assert lb.get_server("least_connections") == "server1"
+    for counts in (restarted, other, owner):
+        counts.close()
+    owner.unlink()
+    print("Shared slot reset when a replica re-attaches")
+
+    mean_spreads = {}
+    context = multiprocessing.get_context("fork")
+    for name, shared_selection in [("Independent replicas", False), ("Shared counts", True)]:
+        block_name = f"lb_counts_{int(shared_selection)}_{time.monotonic_ns()}"
+        totals = SharedConnectionCounts(block_name, servers, num_replicas, 0, create=True)
+        stop = context.Event()
+        processes = [context.Process(target=replica, args=(slot, shared_selection, block_name, stop))
+                     for slot in range(num_replicas)]
+        for process in processes:
+            process.start()
+
+        # Sample the cluster-wide spread between the busiest and idlest server
+        spreads = []
+        deadline = time.monotonic() + duration
+        while time.monotonic() < deadline:
+            counts = [totals.total(server) for server in servers]
+            spreads.append(max(counts) - min(counts))
+            time.sleep(0.01)
+
+        stop.set()
+        for process in processes:
+            process.join()
+        totals.close()
+        totals.unlink()
+        mean_spreads[shared_selection] = sum(spreads) / len(spreads)
+        print(f"{name}: mean imbalance {mean_spreads[shared_selection]:.1f} connections, "
+              f"max {max(spreads)}")
+    assert mean_spreads[True] < mean_spreads[False] / 2
+
+
+def test_overload_benchmark(num_clients=64, duration=2.0, slo=0.1):
+    """Goodput and tail latency under overload, unbounded vs connection-limited."""
+    print("\n=== Overload Benchmark ===\n")
+
+    servers = ["server1", "server2", "server3", "server4"]
+    cores = 4            # requests a backend serves at full speed
+    service_time = 0.01  # seconds per request on an idle backend
+
+    def run(name, lb, limited):
+        latencies = []
+        rejected = [0]
+        results_lock = threading.Lock()
+
+        def client():
+            deadline = time.monotonic() + duration
+            while time.monotonic() < deadline:
+                start = time.monotonic()
+                if limited:
+                    try:
+                        server = lb.acquire_server(timeout=slo)
+                    except (BackpressureError, TimeoutError):
+                        with results_lock:
+                            rejected[0] += 1
+                        time.sleep(service_time)
+                        continue
+                else:
+                    server = lb.get_server("least_connections")
+                    lb.record_connection(server)
+                # Backends thrash once they have more work than cores
+                served = time.monotonic()
+                active = lb.get_server_stats()[server]
+                time.sleep(service_time * max(1.0, active / cores) ** 2)
+                lb.record_disconnection(server, latency=time.monotonic() - served)
+                latency = time.monotonic() - start
+                with results_lock:
+                    latencies.append(latency)
+
+        with concurrent.futures.ThreadPoolExecutor(max_workers=num_clients) as executor:
+            for _ in range(num_clients):
+                executor.submit(client)
+
+        latencies.sort()
+        good = sum(1 for latency in latencies if latency <= slo)
+        p99 = latencies[int(len(latencies) * 0.99)] * 1000 if latencies else 0
+        print(f"{name}: goodput {good / duration:.0f} req/s, p99 {p99:.1f} ms, "
+              f"completed {len(latencies)}, rejected {rejected[0]}")
+
+    run("Unbounded", ThreadSafeLoadBalancer(servers), False)
+    run("max_connections=4", ThreadSafeLoadBalancer(servers, max_connections=cores,
+                                                    max_queue_size=16), True)
+    run("Adaptive (AIMD)", ThreadSafeLoadBalancer(servers, max_connections=cores * 2,
+                                                  max_queue_size=16,
+                                                  target_latency=service_time * 1.5), True)
+
+
 if __name__ == "__main__":
-    test_corrected_load_balancer()
\ No newline at end of file
+    test_corrected_load_balancer()
+    test_acquire_server_limits()
+    test_slow_start_and_outlier_ejection()
+    test_shared_connection_counts()
+    test_overload_benchmark()
\ No newline at end of file
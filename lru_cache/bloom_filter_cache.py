@@ -0,0 +1,110 @@
+import math
+from typing import Optional, Tuple
+
+from thread_safe_lru_cache import ThreadSafeLRUCache
+
+
+class CountingBloomFilter:
+    """
+    Counting Bloom filter with two probes and 8-bit saturating counters.
+    might_contain() never returns a false negative for keys that were added
+    and not removed. Counters that saturate are never decremented again, so
+    they can only cause false positives until the filter is rebuilt.
+    
+    The table is sized so that two probes reach false_positive_rate. The first
+    probe is hash(key) itself, so most misses cost one modulo and one index;
+    the scrambled second probe is only computed when the first one hits.
+    """
+
+    def __init__(self, expected_items: int, false_positive_rate: float = 0.01):
+        if expected_items <= 0:
+            raise ValueError("expected_items must be positive")
+        if not 0 < false_positive_rate < 1:
+            raise ValueError("false_positive_rate must be in (0, 1)")
+
+        # Optimal size for k = 2: m = -k * n / ln(1 - p ** (1 / k))
+        self.size = max(1, math.ceil(-2 * expected_items
+                                     / math.log(1 - math.sqrt(false_positive_rate))))
+        self.counters = bytearray(self.size)
+
+    def _indexes(self, key) -> Tuple[int, int]:
+        h = hash(key)
+        # Second probe scrambles h: hash() of an int is the int itself
+        return h % self.size, ((h * 0x9E3779B97F4A7C15) >> 32) % self.size
+
+    def add(self, key) -> None:
+        counters = self.counters
+        for index in self._indexes(key):
+            if counters[index] < 255:
+                counters[index] += 1
+
+    def remove(self, key) -> None:
+        counters = self.counters
+        for index in self._indexes(key):
+            if 0 < counters[index] < 255:
+                counters[index] -= 1
+
+    def might_contain(self, key) -> bool:
+        """False means key is definitely absent. Safe to call without a lock."""
+        h = hash(key)
+        counters = self.counters
+        if not counters[h % self.size]:
+            return False
+        return counters[((h * 0x9E3779B97F4A7C15) >> 32) % self.size] != 0
+
+
+class BloomFilteredLRUCache(ThreadSafeLRUCache):
+    """
+    Thread-safe LRU Cache with a counting Bloom filter in front of get().
+    Lookups for keys the filter has never seen return -1 without taking the
+    lock. The filter is updated under the lock on put, eviction and removal;
+    a key is added to the filter before it becomes visible in the cache and
+    dropped from it only after it has left, so the lock-free check can only
+    err towards a false positive, which falls back to the locked lookup.
+    """
+
+    def __init__(self, capacity: int, false_positive_rate: float = 0.01):
+        super().__init__(capacity)
+
+        self.false_positive_rate = false_positive_rate
+        self.bloom = CountingBloomFilter(capacity, false_positive_rate)
+        # Lock acquisitions skipped; updated without a lock, so approximate under contention
+        self.negative_hits = 0
+
+    def get(self, key: int) -> int:
+        """Get value by key. Definite misses return -1 without locking."""
+        # Only the first probe is checked here: it rules out most misses and
+        # keeps the extra cost on hits to one hash and one index
+        bloom = self.bloom
+        if not bloom.counters[hash(key) % bloom.size]:
+            self.negative_hits += 1
+            return -1
+        
+        # Same as ThreadSafeLRUCache.get, inlined to save a call on every hit
+        with self.lock:
+            if key not in self.cache:
+                return -1
+            value = self.cache.pop(key)
+            self.cache[key] = value
+            return value
+
+    def _put_locked(self, key: int, value: int) -> Optional[Tuple[int, int]]:
+        if key not in self.cache:
+            self.bloom.add(key)
+        evicted = super()._put_locked(key, value)
+        if evicted is not None:
+            self.bloom.remove(evicted[0])
+        return evicted
+
+    def _remove_locked(self, key: int) -> int:
+        value = super()._remove_locked(key)
+        self.bloom.remove(key)
+        return value
+
+    def rebuild(self) -> None:
+        """Rebuild the filter from the current keys, clearing saturated counters."""
+        with self.lock:
+            bloom = CountingBloomFilter(self.capacity, self.false_positive_rate)
+            for key in self.cache:
+                bloom.add(key)
+            self.bloom = bloom
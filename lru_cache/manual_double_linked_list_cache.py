@@ -1,8 +1,9 @@
 import threading
 import time
+from array import array
 from collections import OrderedDict
 from threading import Lock, RLock, Condition
-from typing import Dict, Optional, Any
+from typing import Dict, Iterator, List, Optional, Any, Tuple
 import concurrent.futures
 import random
 
@@ -35,6 +36,8 @@ class ManualLRUCache:
         self.tail = Node()
         self.head.next = self.tail
         self.tail.prev = self.head
+        # Nodes linked in as iter_items position markers
+        self.cursors = set()
     
     def _add_to_head(self, node: Node) -> None:
         """Add node right after head."""
@@ -54,8 +57,10 @@ class ManualLRUCache:
         self._add_to_head(node)
     
     def _remove_tail(self) -> Node:
-        """Remove and return last node before tail."""
+        """Remove and return last node before tail, skipping scan cursors."""
         last_node = self.tail.prev
+        while last_node in self.cursors:
+            last_node = last_node.prev
         self._remove_node(last_node)
         return last_node
     
@@ -92,4 +97,194 @@ class ManualLRUCache:
     def get_all(self) -> Dict[int, int]:
         """Get snapshot of all key-value pairs."""
         with self.lock:
-            return {key: node.value for key, node in self.cache.items()}
\ No newline at end of file
+            return {key: node.value for key, node in self.cache.items()}
+    
+    def iter_items(self, chunk_size: int = 1000) -> Iterator[Tuple[int, int]]:
+        """
+        Yield key-value pairs from least to most recently used, holding the lock
+        one chunk at a time. A cursor node linked into the list marks the scan
+        position, so nothing is copied up front and each lock hold is O(chunk).
+        Weakly consistent: every key present for the whole scan is yielded
+        exactly once; keys added or removed during the scan may or may not be.
+        """
+        cursor = Node()
+        seen = set()  # Entries used during the scan move ahead of the cursor again
+        with self.lock:
+            self.cursors.add(cursor)
+            # Walk from tail towards head
+            cursor.prev = self.tail.prev
+            cursor.next = self.tail
+            self.tail.prev.next = cursor
+            self.tail.prev = cursor
+        
+        try:
+            while True:
+                chunk = []
+                with self.lock:
+                    node = cursor.prev
+                    while node is not self.head and len(chunk) < chunk_size:
+                        if node not in self.cursors:
+                            chunk.append((node.key, node.value))
+                        node = node.prev
+                    # Park the cursor right after the last node read
+                    self._remove_node(cursor)
+                    cursor.prev = node
+                    cursor.next = node.next
+                    node.next.prev = cursor
+                    node.next = cursor
+                    done = node is self.head
+                
+                for key, value in chunk:
+                    if key not in seen:
+                        seen.add(key)
+                        yield key, value
+                if done:
+                    return
+        finally:
+            with self.lock:
+                self._remove_node(cursor)
+                self.cursors.discard(cursor)
+
+
+# Slot indices of the dummy head and tail in IndexedLRUCache
+HEAD = 0
+TAIL = 1
+
+
+class IndexedLRUCache:
+    """
+    Thread-safe LRU Cache with the doubly linked list stored in flat arrays.
+    Links are slot indices rather than object references, so the cache holds
+    no reference cycles and no per-entry containers. Dicts holding only ints
+    are untracked by CPython, so the cyclic GC has nothing here to traverse.
+    """
+    
+    def __init__(self, capacity: int):
+        if capacity <= 0:
+            raise ValueError("Capacity must be positive")
+        
+        self.capacity = capacity
+        self.cache: Dict[int, int] = {}       # key -> value
+        self.slots: Dict[int, int] = {}       # key -> slot index
+        self.slot_keys: Dict[int, int] = {}   # slot index -> key
+        self.lock = Lock()
+        
+        # prev/next links per slot; slots 0 and 1 are the dummy head and tail
+        self.prev = array('q', [HEAD, HEAD])
+        self.next = array('q', [TAIL, TAIL])
+        # Slots linked in as iter_items position markers, and retired ones to reuse
+        self.cursor_slots = set()
+        self.free_cursor_slots: List[int] = []
+    
+    def _add_to_head(self, slot: int) -> None:
+        """Link slot right after head."""
+        first = self.next[HEAD]
+        self.prev[slot] = HEAD
+        self.next[slot] = first
+        self.prev[first] = slot
+        self.next[HEAD] = slot
+    
+    def _remove_slot(self, slot: int) -> None:
+        """Unlink slot from the list."""
+        self.next[self.prev[slot]] = self.next[slot]
+        self.prev[self.next[slot]] = self.prev[slot]
+    
+    def _move_to_head(self, slot: int) -> None:
+        """Move slot to head (most recently used)."""
+        self._remove_slot(slot)
+        self._add_to_head(slot)
+    
+    def get(self, key: int) -> int:
+        """Get value by key. Returns -1 if key doesn't exist."""
+        with self.lock:
+            slot = self.slots.get(key)
+            if slot is None:
+                return -1
+            
+            self._move_to_head(slot)
+            return self.cache[key]
+    
+    def put(self, key: int, value: int) -> None:
+        """Put key-value pair. Evicts LRU item if capacity exceeded."""
+        with self.lock:
+            slot = self.slots.get(key)
+            if slot is not None:
+                self.cache[key] = value
+                self._move_to_head(slot)
+                return
+            
+            if len(self.slots) >= self.capacity:
+                # Reuse the LRU slot instead of growing the arrays
+                slot = self.prev[TAIL]
+                while slot in self.cursor_slots:
+                    slot = self.prev[slot]
+                self._remove_slot(slot)
+                old_key = self.slot_keys[slot]
+                del self.slots[old_key]
+                del self.cache[old_key]
+            else:
+                slot = len(self.prev)
+                self.prev.append(HEAD)
+                self.next.append(TAIL)
+            
+            self.cache[key] = value
+            self.slots[key] = slot
+            self.slot_keys[slot] = key
+            self._add_to_head(slot)
+    
+    def get_all(self) -> Dict[int, int]:
+        """Get snapshot of all key-value pairs."""
+        with self.lock:
+            return dict(self.cache)
+    
+    def iter_items(self, chunk_size: int = 1000) -> Iterator[Tuple[int, int]]:
+        """
+        Yield key-value pairs one chunk at a time by walking the slot links
+        from a cursor slot, with the same semantics as ManualLRUCache.iter_items.
+        """
+        seen = set()
+        with self.lock:
+            if self.free_cursor_slots:
+                cursor = self.free_cursor_slots.pop()
+            else:
+                cursor = len(self.prev)
+                self.prev.append(HEAD)
+                self.next.append(TAIL)
+            self.cursor_slots.add(cursor)
+            # Walk from tail towards head
+            last = self.prev[TAIL]
+            self.prev[cursor] = last
+            self.next[cursor] = TAIL
+            self.next[last] = cursor
+            self.prev[TAIL] = cursor
+        
+        try:
+            while True:
+                chunk = []
+                with self.lock:
+                    slot = self.prev[cursor]
+                    while slot != HEAD and len(chunk) < chunk_size:
+                        if slot not in self.cursor_slots:
+                            key = self.slot_keys[slot]
+                            chunk.append((key, self.cache[key]))
+                        slot = self.prev[slot]
+                    # Park the cursor right after the last slot read
+                    self._remove_slot(cursor)
+                    following = self.next[slot]
+                    self.prev[cursor] = slot
+                    self.next[cursor] = following
+                    self.prev[following] = cursor
+                    self.next[slot] = cursor
+                    done = slot == HEAD
+                
+                for key, value in chunk:
+                    if key not in seen:
+                        seen.add(key)
+                        yield key, value
+                if done:
+                    return
+        finally:
+            with self.lock:
+                self._remove_slot(cursor)
+                self.cursor_slots.discard(cursor)
+                self.free_cursor_slots.append(cursor)
@@ -2,7 +2,7 @@ import threading
 import time
 from collections import OrderedDict
 from threading import Lock, RLock, Condition
-from typing import Dict, Optional, Any
+from typing import Dict, Iterator, Optional, Any, Tuple
 import concurrent.futures
 import random
 
@@ -96,4 +96,27 @@ class ReadWriteLRUCache:
         try:
             return dict(self.cache)
         finally:
-            self.rw_lock.release_read()
\ No newline at end of file
+            self.rw_lock.release_read()
+    
+    def iter_items(self, chunk_size: int = 1000) -> Iterator[Tuple[int, int]]:
+        """
+        Yield key-value pairs, taking the read lock once per chunk.
+        Weakly consistent: keys present at the start are yielded unless removed
+        before their chunk is read; keys added during the scan are not yielded.
+        The keys are copied once up front because an OrderedDict iterator
+        cannot resume after the dict changes.
+        """
+        self.rw_lock.acquire_read()
+        try:
+            keys = list(self.cache)
+        finally:
+            self.rw_lock.release_read()
+        
+        for start in range(0, len(keys), chunk_size):
+            self.rw_lock.acquire_read()
+            try:
+                chunk = [(key, self.cache[key])
+                         for key in keys[start:start + chunk_size] if key in self.cache]
+            finally:
+                self.rw_lock.release_read()
+            yield from chunk
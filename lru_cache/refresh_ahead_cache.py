@@ -0,0 +1,105 @@
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Optional, Set, Tuple
+
+from thread_safe_lru_cache import ThreadSafeLRUCache
+
+logger = logging.getLogger(__name__)
+
+class RefreshAheadLRUCache(ThreadSafeLRUCache):
+    """
+    Read-through LRU Cache with expiry and asynchronous refresh-ahead.
+    Entries expire ttl seconds after they were loaded. Reading an entry that
+    is past refresh_fraction of its lifetime returns the cached value at once
+    and schedules a reload on a bounded thread pool, at most one per key, so
+    hot keys are refreshed before they expire instead of missing. After
+    close(), expired entries still reload synchronously but none are refreshed
+    ahead.
+    """
+
+    def __init__(self, capacity: int, loader: Callable[[int], int], ttl: float,
+                 refresh_fraction: float = 0.75, max_workers: int = 4):
+        super().__init__(capacity)
+        if ttl <= 0:
+            raise ValueError("ttl must be positive")
+        if not 0 < refresh_fraction <= 1:
+            raise ValueError("refresh_fraction must be in (0, 1]")
+
+        self.loader = loader
+        self.ttl = ttl
+        self.refresh_after = ttl * refresh_fraction
+        self.loaded_at: Dict[int, float] = {}
+        self.refreshing: Set[int] = set()  # Keys with a reload in flight
+        self.executor = ThreadPoolExecutor(max_workers=max_workers)
+        self.closed = False
+
+    def _put_locked(self, key: int, value: int) -> Optional[Tuple[int, int]]:
+        """Insert or update key and restart its lifetime."""
+        evicted = super()._put_locked(key, value)
+        self.loaded_at[key] = time.monotonic()
+        if evicted is not None:
+            del self.loaded_at[evicted[0]]
+        return evicted
+
+    def _remove_locked(self, key: int) -> int:
+        del self.loaded_at[key]
+        return super()._remove_locked(key)
+
+    def get(self, key: int) -> int:
+        """Get value by key, loading it synchronously on a miss or after expiry."""
+        with self.lock:
+            if key in self.cache:
+                age = time.monotonic() - self.loaded_at[key]
+                if age < self.ttl:
+                    # Move to end (most recently used)
+                    value = self.cache.pop(key)
+                    self.cache[key] = value
+                    if age < self.refresh_after or key in self.refreshing or self.closed:
+                        return value
+                    self.refreshing.add(key)
+                    refresh = True
+                    stamp = self.loaded_at[key]
+                else:
+                    refresh = False
+            else:
+                refresh = False
+
+        if refresh:
+            try:
+                self.executor.submit(self._refresh, key, stamp)
+            except RuntimeError:
+                # close() shut the pool down after the check above
+                with self.lock:
+                    self.refreshing.discard(key)
+            return value
+
+        value = self.loader(key)
+        self.put(key, value)
+        return value
+
+    def _refresh(self, key: int, stamp: float) -> None:
+        """
+        Reload key in the background. The result is dropped if the entry was
+        written, removed or evicted since the refresh was scheduled (stamp).
+        """
+        try:
+            value = self.loader(key)
+        except Exception:
+            # Keep serving the current value; it reloads synchronously on expiry
+            logger.exception("Refresh-ahead load of key %r failed", key)
+            with self.lock:
+                self.refreshing.discard(key)
+            return
+
+        with self.lock:
+            self.refreshing.discard(key)
+            if self.loaded_at.get(key) != stamp:
+                return
+            self._put_locked(key, value)  # Key is present, so nothing is evicted
+
+    def close(self) -> None:
+        """Wait for in-flight refreshes and stop the thread pool."""
+        with self.lock:
+            self.closed = True
+        self.executor.shutdown(wait=True)
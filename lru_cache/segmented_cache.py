@@ -2,7 +2,7 @@ import threading
 import time
 from collections import OrderedDict
 from threading import Lock, RLock, Condition
-from typing import Dict, Optional, Any
+from typing import Dict, Iterator, Optional, Any, Tuple
 import concurrent.futures
 import random
 
@@ -36,9 +36,28 @@ class SegmentedLRUCache:
         """Put value in appropriate segment."""
         self._get_segment(key).put(key, value)
     
+    def remove(self, key: int) -> bool:
+        """Remove key from its segment."""
+        return self._get_segment(key).remove(key)
+    
+    def add_listener(self, listener) -> None:
+        """Register an eviction/removal listener on every segment."""
+        for segment in self.segments:
+            segment.add_listener(listener)
+    
     def get_all(self) -> Dict[int, int]:
         """Get all key-value pairs from all segments."""
         result = {}
         for segment in self.segments:
             result.update(segment.get_all())
-        return result
\ No newline at end of file
+        return result
+    
+    def iter_items(self, chunk_size: int = 1000,
+                   consistent: bool = False) -> Iterator[Tuple[int, int]]:
+        """
+        Yield all key-value pairs one segment at a time, so writers only ever
+        wait on the segment being scanned. With consistent=True each segment is
+        a point-in-time snapshot, but segments are captured at different times.
+        """
+        for segment in self.segments:
+            yield from segment.iter_items(chunk_size, consistent)
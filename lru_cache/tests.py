@@ -4,6 +4,7 @@ from collections import OrderedDict
 from threading import Lock, RLock, Condition
 from typing import Dict, Optional, Any
 import concurrent.futures
+import gc
 import random
 
 def test_basic_functionality():
@@ -147,6 +148,523 @@ def test_edge_cases():
     except ValueError:
         print("✅ Invalid capacity handling test passed")
     
+    for cache_class in (IndexedLRUCache, IndexedRWLRUCache):
+        try:
+            cache_class(0)
+            assert False, "Should have raised ValueError"
+        except ValueError:
+            pass
+    print("✅ Indexed cache invalid capacity test passed")
+    
+    print()
+
+
+def test_listeners_and_write_behind():
+    """Test eviction/removal listeners and write-behind flushing."""
+    print("=== Listeners and Write-Behind Test ===")
+    
+    events = []
+    cache = ThreadSafeLRUCache(2)
+    cache.add_listener(lambda key, value, cause: events.append((key, value, cause)))
+    cache.put(1, 10)
+    cache.put(2, 20)
+    cache.put(3, 30)  # evicts key 1
+    assert cache.remove(2)
+    assert not cache.remove(2)
+    assert events == [(1, 10, "evicted"), (2, 20, "removed")]
+    print("✅ Listener test passed")
+    
+    # Dict-backed fake store that records every batch it receives
+    store = {}
+    batches = []
+    
+    def fake_store(batch):
+        batches.append(dict(batch))
+        store.update(batch)
+    
+    cache = WriteBehindLRUCache(2, fake_store, flush_interval=60, batch_size=1000)
+    for i in range(100):
+        cache.put(1, i)  # repeated writes coalesce into a single dirty entry
+    cache.put(2, 2)
+    cache.put(3, 3)  # evicts dirty key 1
+    assert store == {}
+    assert cache.get(1) == 99  # still visible until flushed
+    cache.flush()
+    assert store == {1: 99, 2: 2, 3: 3}
+    assert batches == [{1: 99, 2: 2, 3: 3}]
+    cache.close()
+    print("✅ Write-behind coalescing test passed")
+    
+    store.clear()
+    batches.clear()
+    cache = WriteBehindLRUCache(10, fake_store, flush_interval=60, batch_size=1000)
+    cache.put(1, 10)
+    assert cache.remove(1)
+    assert cache.get(1) == -1  # pending write is discarded with the entry
+    cache.put(2, 2)
+    cache.put(3, 3)  # evicted dirty key 2 is still flushed, removed key 1 is not
+    cache.flush()
+    assert store == {2: 2, 3: 3}
+    cache.close()
+    
+    store.clear()
+    cache = WriteBehindLRUCache(1, fake_store, flush_interval=60, batch_size=1000)
+    cache.put(1, 1)
+    cache.put(2, 2)  # evicts dirty key 1
+    assert cache.remove(1)  # only the pending write was left
+    assert not cache.remove(1)
+    assert cache.get(1) == -1
+    cache.flush()
+    assert store == {2: 2}
+    cache.close()
+    print("✅ Write-behind remove test passed")
+    
+    # Entries stay readable while the store call writing them is still running
+    store.clear()
+    gate = threading.Event()
+    entered = threading.Event()
+    
+    def gated_store(batch):
+        entered.set()
+        gate.wait()
+        store.update(batch)
+    
+    cache = WriteBehindLRUCache(1, gated_store, flush_interval=60, batch_size=1000)
+    cache.put(1, 1)
+    cache.put(2, 2)  # evicts dirty key 1
+    flusher = threading.Thread(target=cache.flush)
+    flusher.start()
+    entered.wait()
+    assert cache.get(1) == 1 and 1 not in store
+    gate.set()
+    flusher.join()
+    assert store == {1: 1, 2: 2} and cache.in_flight == {}
+    assert cache.get(1) == -1  # written, so it is now only in the store
+    cache.close()
+    print("✅ Write-behind in-flight read test passed")
+    
+    batches.clear()
+    cache = WriteBehindLRUCache(1000, fake_store, flush_interval=60, batch_size=10)
+    for i in range(500):
+        cache.put(i, i)
+    cache.close()
+    assert len(batches) == 50 and all(len(batch) <= 10 for batch in batches)
+    print("✅ Write-behind batch size test passed")
+    
+    calls = []
+    
+    def failing_store(batch):
+        calls.append(len(batch))
+        raise IOError("store unavailable")
+    
+    cache = WriteBehindLRUCache(100, failing_store, flush_interval=0.05, batch_size=1)
+    cache.put(1, 1)
+    time.sleep(0.5)
+    assert len(calls) <= 6  # backs off instead of spinning on the failing store
+    assert cache.flush_errors >= 1 and isinstance(cache.last_error, IOError)
+    cache.close()
+    assert cache.get(1) == 1 and cache.dirty == {1: 1}  # still pending, not dropped
+    print("✅ Write-behind failure backoff test passed")
+    
+    store.clear()
+    cache = WriteBehindLRUCache(10, fake_store, flush_interval=0.01)
+    with concurrent.futures.ThreadPoolExecutor(max_workers=4) as executor:
+        for thread_id in range(4):
+            executor.submit(lambda t: [cache.put(t * 100 + i, i) for i in range(100)], thread_id)
+    cache.close()
+    assert len(store) == 400
+    print("✅ Background flusher test passed")
+    
+    print()
+
+
+def test_refresh_ahead_benchmark(ttl=0.2, load_time=0.02, duration=1.5, num_threads=4):
+    """Compare get latency across expiry boundaries with and without refresh-ahead."""
+    print("=== Refresh-Ahead Benchmark ===")
+    
+    loads = []
+    
+    def slow_loader(key):
+        loads.append(key)
+        time.sleep(load_time)
+        return key * 2
+    
+    cache = RefreshAheadLRUCache(10, slow_loader, ttl=0.1, refresh_fraction=0.5)
+    assert cache.get(1) == 2  # synchronous read-through on a miss
+    time.sleep(0.06)
+    for _ in range(100):
+        assert cache.get(1) == 2  # stale reads return at once
+    cache.close()
+    assert len(loads) == 2  # one miss plus one deduplicated refresh
+    print("✅ Refresh deduplication test passed")
+    
+    # A put made while a refresh is loading must not be overwritten by it
+    load_values = iter([1, 111])
+    release = threading.Event()
+    
+    def gated_loader(key):
+        value = next(load_values)
+        if value == 111:
+            release.wait(5)  # hold the background refresh until put() has run
+        return value
+    
+    cache = RefreshAheadLRUCache(10, gated_loader, ttl=0.1, refresh_fraction=0.5)
+    assert cache.get(1) == 1
+    time.sleep(0.06)
+    assert cache.get(1) == 1  # schedules the refresh, which blocks in the loader
+    cache.put(1, 999)
+    release.set()
+    cache.close()
+    assert cache.get(1) == 999
+    print("✅ Refresh does not clobber concurrent put test passed")
+    
+    # Stale reads after close() return the cached value without scheduling a refresh
+    for shutdown in [lambda cache: cache.close(), lambda cache: cache.executor.shutdown()]:
+        loads.clear()
+        cache = RefreshAheadLRUCache(10, slow_loader, ttl=0.2, refresh_fraction=0.25)
+        assert cache.get(1) == 2
+        time.sleep(0.06)
+        shutdown(cache)  # executor.shutdown() alone is close() racing a get()
+        assert cache.get(1) == 2
+        assert cache.refreshing == set() and loads == [1]
+    print("✅ Refresh after close test passed")
+    
+    for name, refresh_fraction in [("Expire only", 1.0), ("Refresh-ahead", 0.5)]:
+        cache = RefreshAheadLRUCache(100, slow_loader, ttl=ttl,
+                                     refresh_fraction=refresh_fraction)
+        hot_keys = list(range(10))
+        for key in hot_keys:
+            cache.get(key)
+        
+        def worker(thread_id):
+            rand = random.Random(thread_id)
+            latencies = []
+            deadline = time.monotonic() + duration
+            while time.monotonic() < deadline:
+                key = rand.choice(hot_keys)
+                start_time = time.perf_counter()
+                cache.get(key)
+                latencies.append(time.perf_counter() - start_time)
+                time.sleep(0.0005)
+            return latencies
+        
+        with concurrent.futures.ThreadPoolExecutor(max_workers=num_threads) as executor:
+            futures = [executor.submit(worker, i) for i in range(num_threads)]
+            latencies = sorted(l for f in futures for l in f.result())
+        cache.close()
+        
+        p50 = latencies[len(latencies) // 2] * 1000
+        p99 = latencies[int(len(latencies) * 0.99)] * 1000
+        print(f"{name}: p50 {p50:.3f} ms, p99 {p99:.3f} ms ({len(latencies)} gets)")
+    
+    print()
+
+
+def test_bloom_filter_benchmark(capacity=10000, operations=200000, num_threads=4, repeats=5):
+    """Measure lock acquisitions avoided and miss-path latency with a Bloom filter."""
+    print("=== Bloom Filter Negative Lookup Benchmark ===")
+    
+    cache = BloomFilteredLRUCache(2)
+    cache.put(1, 1)
+    cache.put(2, 2)
+    cache.put(3, 3)  # evicts key 1 and drops it from the filter
+    assert cache.get(1) == -1 and cache.get(3) == 3
+    assert cache.remove(3) and not cache.bloom.might_contain(3)
+    cache.rebuild()
+    assert cache.get(2) == 2
+    print("✅ Bloom filter sync test passed")
+    
+    # Pre-generate operations so the timed loops measure the cache, not random()
+    rand = random.Random(0)
+    miss_keys = [capacity + i for i in range(operations)]
+    thread_ops = []
+    for _ in range(num_threads):
+        ops = []
+        for _ in range(operations // num_threads):
+            roll = rand.random()
+            if roll < 0.4:  # 40% of lookups are for keys that were never cached
+                ops.append((False, rand.randint(capacity, capacity * 100)))
+            elif roll < 0.46:
+                ops.append((True, rand.randint(0, capacity - 1)))
+            else:
+                ops.append((False, rand.randint(0, capacity - 1)))
+        thread_ops.append(ops)
+    
+    for name, cache_class in [("Basic Synchronized", ThreadSafeLRUCache),
+                              ("Bloom Filtered", BloomFilteredLRUCache)]:
+        miss_latency = mixed_elapsed = float("inf")
+        for _ in range(repeats):
+            cache = cache_class(capacity)
+            for key in range(capacity):
+                cache.put(key, key)
+            
+            start_time = time.perf_counter()
+            for key in miss_keys:
+                cache.get(key)
+            miss_latency = min(miss_latency,
+                               (time.perf_counter() - start_time) / operations * 1e9)
+            
+            def worker(ops):
+                get, put = cache.get, cache.put
+                for is_put, key in ops:
+                    if is_put:
+                        put(key, key)
+                    else:
+                        get(key)
+            
+            cache.negative_hits = 0
+            start_time = time.perf_counter()
+            threads = [threading.Thread(target=worker, args=(ops,)) for ops in thread_ops]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            mixed_elapsed = min(mixed_elapsed, (time.perf_counter() - start_time) * 1000)
+        
+        avoided = getattr(cache, "negative_hits", 0)
+        print(f"{name}: miss path {miss_latency:.0f} ns, mixed load {mixed_elapsed:.2f} ms "
+              f"({num_threads} threads, best of {repeats}), "
+              f"lock acquisitions avoided in mixed load {avoided}")
+    
+    print()
+
+
+def test_iter_items():
+    """Test chunked and snapshot iteration under concurrent modification."""
+    print("=== Iteration Test ===")
+    
+    for cache in [ThreadSafeLRUCache(100), ManualLRUCache(100), IndexedLRUCache(100),
+                  ReadWriteLRUCache(100), SegmentedLRUCache(100, 4), TimeoutLRUCache(100)]:
+        for key in range(100):
+            cache.put(key, key)
+        assert dict(cache.iter_items(chunk_size=7)) == cache.get_all()
+    print("✅ Chunked iteration test passed")
+    
+    cache = ThreadSafeLRUCache(100)
+    for key in range(100):
+        cache.put(key, key)
+    weak = cache.iter_items(chunk_size=10)
+    snapshot = cache.iter_items(chunk_size=10, consistent=True)
+    assert next(weak) == (0, 0) and next(snapshot) == (0, 0)
+    cache.put(50, -50)     # update
+    cache.remove(60)       # removal
+    cache.put(100, 100)    # insert, evicts key 0
+    weak_items = dict(weak)
+    snapshot_items = dict(snapshot)
+    assert weak_items[50] == -50 and 60 not in weak_items and 100 not in weak_items
+    assert snapshot_items == {key: key for key in range(1, 100)}
+    assert cache.snapshots == []
+    print("✅ Weak and snapshot consistency test passed")
+    
+    for cache in [ManualLRUCache(100), IndexedLRUCache(100)]:
+        for key in range(100):
+            cache.put(key, key)
+        first = cache.iter_items(chunk_size=10)
+        second = cache.iter_items(chunk_size=10)
+        assert next(first) == (0, 0) and next(second) == (0, 0)
+        cache.get(5)           # already read: moves ahead of the cursor, not repeated
+        cache.get(50)          # not read yet: still yielded once
+        cache.put(60, -60)     # update
+        cache.put(100, 100)    # insert at head, ahead of the cursors: yielded
+        cache.put(101, 101)    # evicts key 1, already read in the first chunk
+        expected = {key: key for key in range(102)}
+        expected[60] = -60
+        first_items = [(0, 0)] + list(first)
+        assert len(first_items) == len(expected) and dict(first_items) == expected
+        assert dict([(0, 0)] + list(second)) == expected
+        assert len(cache.get_all()) == 100 and 1 not in cache.get_all()
+    print("✅ Linked-list cursor iteration test passed")
+    
+    print()
+
+
+def test_scan_writer_stall_benchmark(num_entries=2_000_000, num_segments=16):
+    """Measure writer stall time while a full scan runs."""
+    print("=== Scan Writer Stall Benchmark ===")
+    
+    cache = ThreadSafeLRUCache(num_entries)
+    segmented = SegmentedLRUCache(num_entries, num_segments)
+    manual = ManualLRUCache(num_entries)
+    indexed = IndexedLRUCache(num_entries)
+    for i in range(num_entries):
+        cache.put(i, i)
+        segmented.put(i, i)
+        manual.put(i, i)
+        indexed.put(i, i)
+    # Keep gen2 collections of the caches out of the measurement
+    gc.collect()
+    gc.freeze()
+    
+    scans = [
+        ("get_all()", cache, lambda: cache.get_all()),
+        ("iter_items()", cache, lambda: sum(1 for _ in cache.iter_items())),
+        ("iter_items(consistent=True)", cache,
+         lambda: sum(1 for _ in cache.iter_items(consistent=True))),
+        ("Segmented iter_items()", segmented, lambda: sum(1 for _ in segmented.iter_items())),
+        ("Manual iter_items()", manual, lambda: sum(1 for _ in manual.iter_items())),
+        ("Indexed iter_items()", indexed, lambda: sum(1 for _ in indexed.iter_items())),
+    ]
+    
+    for name, target, scan in scans:
+        stop = threading.Event()
+        stalls = []
+        
+        def writer():
+            rand = random.Random(0)
+            while not stop.is_set():
+                start_time = time.perf_counter()
+                target.put(rand.randint(0, num_entries - 1), 0)
+                stalls.append(time.perf_counter() - start_time)
+        
+        thread = threading.Thread(target=writer)
+        thread.start()
+        time.sleep(0.05)
+        start_time = time.perf_counter()
+        scan()
+        scan_elapsed = (time.perf_counter() - start_time) * 1000
+        stop.set()
+        thread.join()
+        
+        print(f"{name}: scan {scan_elapsed:.1f} ms, max writer stall "
+              f"{max(stalls) * 1000:.2f} ms, total stall {sum(stalls) * 1000:.1f} ms")
+    
+    gc.unfreeze()
+    print()
+
+
+def test_priority_deadline_benchmark(duration=1.0, num_writers=8, num_readers=2, budget=0.002):
+    """Deadline-miss rate of high-priority reads under bulk write load."""
+    print("=== Priority Deadline Benchmark ===")
+    
+    cache = TimeoutLRUCache(10)
+    deadline = time.monotonic() + 0.01
+    assert cache.lock.acquire(deadline=deadline)
+    assert not cache.lock.acquire(deadline=deadline)
+    cache.lock.release()
+    try:
+        assert cache.lock.acquire()
+        cache.get(1, deadline=time.monotonic() + 0.01)
+        assert False, "Should have raised TimeoutError"
+    except TimeoutError:
+        cache.lock.release()
+    assert cache.lock_stats()["timeouts"] == 2
+    print("✅ Deadline timeout test passed")
+    
+    for name, reader_priority in [("Same priority (FIFO)", 10), ("High-priority reads", 0)]:
+        cache = TimeoutLRUCache(50000)
+        for i in range(50000):
+            cache.put(i, i)
+        stop = threading.Event()
+        
+        def bulk_writer(thread_id):
+            rand = random.Random(thread_id)
+            while not stop.is_set():
+                if rand.random() < 0.05:
+                    cache.get_all(priority=10)  # bulk copy holds the lock for a while
+                else:
+                    cache.put(rand.randint(0, 99999), thread_id, priority=10)
+        
+        def reader(thread_id):
+            rand = random.Random(thread_id)
+            reads = misses = 0
+            while not stop.is_set():
+                reads += 1
+                try:
+                    cache.get(rand.randint(0, 99999), deadline=time.monotonic() + budget,
+                              priority=reader_priority)
+                except TimeoutError:
+                    misses += 1
+                time.sleep(0.0005)
+            return reads, misses
+        
+        with concurrent.futures.ThreadPoolExecutor(max_workers=num_writers + num_readers) as executor:
+            for i in range(num_writers):
+                executor.submit(bulk_writer, i)
+            futures = [executor.submit(reader, i) for i in range(num_readers)]
+            time.sleep(duration)
+            stop.set()
+            results = [future.result() for future in futures]
+        
+        reads = sum(r for r, _ in results)
+        misses = sum(m for _, m in results)
+        print(f"{name}: {misses}/{reads} reads missed a {budget * 1000:.0f} ms deadline "
+              f"({misses / reads:.1%}), lock stats {cache.lock_stats()}")
+    
+    print()
+
+
+def test_gc_pause_benchmark(num_entries=1_000_000, num_ops=200_000):
+    """Compare GC pauses of node-based and indexed lists under allocation load."""
+    print("=== GC Pause Benchmark ===")
+    
+    cache = IndexedLRUCache(10)
+    rw_cache = IndexedRWLRUCache(10)
+    for i in range(20):
+        cache.put(i, i)
+        rw_cache.put(i, i)
+    for container in [cache.cache, cache.slots, cache.slot_keys,
+                      rw_cache.valueMap, rw_cache.slotMap, rw_cache.slotKeys]:
+        assert not gc.is_tracked(container)
+    print("✅ Indexed cache dicts are untracked by GC")
+    
+    implementations = [
+        ("Manual Implementation", ManualLRUCache),
+        ("Indexed Implementation", IndexedLRUCache),
+        ("ReadWrite Improved", LRUCache),
+        ("Indexed ReadWrite", IndexedRWLRUCache),
+    ]
+    
+    # Time every collection, keyed by generation
+    pauses = []
+    gc_started = []
+    
+    def on_gc(phase, info):
+        if phase == "start":
+            gc_started.append(time.perf_counter())
+        else:
+            pauses.append((info["generation"], time.perf_counter() - gc_started.pop()))
+    
+    for name, cache_class in implementations:
+        cache = cache_class(num_entries)
+        for i in range(num_entries):
+            cache.put(i, i)
+        
+        start_time = time.perf_counter()
+        gc.collect()
+        gc_elapsed = (time.perf_counter() - start_time) * 1000
+        
+        rand = random.Random(0)
+        latencies = []
+        survivors = []
+        next_key = num_entries
+        pauses.clear()
+        gc.callbacks.append(on_gc)
+        try:
+            for i in range(num_ops):
+                start_time = time.perf_counter()
+                # Long-lived objects allocated by the rest of the application
+                # drive collections, including full ones, during the loop
+                survivors.append([[i], [i]])
+                if i % 10 == 0:
+                    cache.put(next_key, next_key)
+                    next_key += 1
+                cache.get(rand.randint(next_key - num_entries, next_key - 1))
+                latencies.append(time.perf_counter() - start_time)
+        finally:
+            gc.callbacks.remove(on_gc)
+        
+        full = [pause for generation, pause in pauses if generation == 2]
+        assert full, "allocation load should trigger full collections"
+        latencies.sort()
+        p999 = latencies[int(len(latencies) * 0.999)] * 1e6
+        print(f"{name}: gc.collect() {gc_elapsed:.2f} ms, {len(full)} full collections "
+              f"{sum(full) * 1000:.1f} ms (max {max(full) * 1000:.1f} ms), "
+              f"all collections {sum(pause for _, pause in pauses) * 1000:.1f} ms, "
+              f"p999 op {p999:.1f} us, max op {latencies[-1] * 1000:.1f} ms")
+        
+        del cache, survivors
+        gc.collect()
+    
     print()
 
 
@@ -158,5 +676,12 @@ if __name__ == "__main__":
     test_performance_comparison()
     test_concurrent_performance()
     test_edge_cases()
+    test_listeners_and_write_behind()
+    test_refresh_ahead_benchmark()
+    test_bloom_filter_benchmark()
+    test_iter_items()
+    test_scan_writer_stall_benchmark()
+    test_priority_deadline_benchmark()
+    test_gc_pause_benchmark()
     
     print("All tests completed successfully! 🎉")
\ No newline at end of file
@@ -2,10 +2,13 @@ import threading
 import time
 from collections import OrderedDict
 from threading import Lock, RLock, Condition
-from typing import Dict, Optional, Any
+from typing import Callable, Dict, Iterator, List, Optional, Any, Tuple
 import concurrent.futures
 import random
 
+# Preimage marker for keys that were absent when a snapshot started
+_MISSING = object()
+
 # ========== APPROACH 1: Basic Thread-Safe LRU Cache ==========
 class ThreadSafeLRUCache:
     """
@@ -20,6 +23,23 @@ class ThreadSafeLRUCache:
         self.capacity = capacity
         self.cache = OrderedDict()
         self.lock = Lock()  # Regular lock is sufficient - no recursive calls
+        # Replaced (never mutated) on registration so it can be read without the lock
+        self.listeners: List[Callable[[int, int, str], None]] = []
+        # One preimage dict per consistent scan in progress: key -> value at scan start
+        self.snapshots: List[Dict[int, Any]] = []
+    
+    def add_listener(self, listener: Callable[[int, int, str], None]) -> None:
+        """
+        Register listener(key, value, cause) fired when an entry leaves the cache.
+        cause is "evicted" or "removed". Listeners run outside the cache lock.
+        """
+        with self.lock:
+            self.listeners = self.listeners + [listener]
+    
+    def _notify(self, key: int, value: int, cause: str) -> None:
+        """Call listeners. Must be called without holding the lock."""
+        for listener in self.listeners:
+            listener(key, value, cause)
     
     def get(self, key: int) -> int:
         """Get value by key. Returns -1 if key doesn't exist."""
@@ -32,27 +52,95 @@ class ThreadSafeLRUCache:
             self.cache[key] = value
             return value
     
+    def _put_locked(self, key: int, value: int) -> Optional[Tuple[int, int]]:
+        """Insert or update key with the lock held. Returns the evicted entry, if any."""
+        evicted = None
+        if self.snapshots:
+            self._save_preimage(key)
+        if key in self.cache:
+            # Update existing key and move to end
+            self.cache.pop(key)
+        elif len(self.cache) >= self.capacity:
+            # Remove least recently used (first item)
+            if self.snapshots:
+                self._save_preimage(next(iter(self.cache)))
+            evicted = self.cache.popitem(last=False)
+        
+        self.cache[key] = value
+        return evicted
+    
     def put(self, key: int, value: int) -> None:
         """Put key-value pair. Evicts LRU item if capacity exceeded."""
         with self.lock:
-            if key in self.cache:
-                # Update existing key and move to end
-                self.cache.pop(key)
-                self.cache[key] = value
-            else:
-                # Add new key
-                if len(self.cache) >= self.capacity:
-                    # Remove least recently used (first item)
-                    self.cache.popitem(last=False)
-                
-                self.cache[key] = value
+            evicted = self._put_locked(key, value)
+        
+        if evicted is not None:
+            self._notify(*evicted, "evicted")
+    
+    def remove(self, key: int) -> bool:
+        """Remove key. Returns True if it was present."""
+        with self.lock:
+            if key not in self.cache:
+                return False
+            value = self._remove_locked(key)
+        
+        self._notify(key, value, "removed")
+        return True
+    
+    def _remove_locked(self, key: int) -> int:
+        """Remove a present key with the lock held. Returns its value."""
+        if self.snapshots:
+            self._save_preimage(key)
+        return self.cache.pop(key)
+    
+    def _save_preimage(self, key: int) -> None:
+        """Record key's current value for consistent scans, before it is first changed."""
+        for preimages in self.snapshots:
+            if key not in preimages:
+                preimages[key] = self.cache.get(key, _MISSING)
     
     def get_all(self) -> Dict[int, int]:
         """Get snapshot of all key-value pairs without affecting LRU order."""
         with self.lock:
             return dict(self.cache)
     
+    def iter_items(self, chunk_size: int = 1000,
+                   consistent: bool = False) -> Iterator[Tuple[int, int]]:
+        """
+        Yield (key, value) pairs in LRU order, holding the lock one chunk at a time.
+        The keys present at the start are captured with a single key-list copy,
+        since an OrderedDict iterator cannot resume after the dict changes;
+        keys added later are not yielded.
+        
+        By default the scan is weakly consistent: keys removed before their chunk
+        is read are skipped and values are as of that chunk. With consistent=True
+        the scan is a point-in-time snapshot: writers save the old value of each
+        key they change while the scan is open, and the scan yields those.
+        """
+        preimages: Dict[int, Any] = {}
+        with self.lock:
+            keys = list(self.cache)
+            if consistent:
+                self.snapshots.append(preimages)
+        
+        try:
+            for start in range(0, len(keys), chunk_size):
+                chunk = []
+                with self.lock:
+                    for key in keys[start:start + chunk_size]:
+                        value = preimages.get(key, _MISSING)
+                        if value is _MISSING:
+                            value = self.cache.get(key, _MISSING)
+                        if value is not _MISSING:
+                            chunk.append((key, value))
+                yield from chunk
+        finally:
+            if consistent:
+                with self.lock:
+                    # Compare by identity: several open scans may hold equal dicts
+                    self.snapshots = [p for p in self.snapshots if p is not preimages]
+    
     def size(self) -> int:
         """Get current cache size."""
         with self.lock:
-            return len(self.cache)
\ No newline at end of file
+            return len(self.cache)
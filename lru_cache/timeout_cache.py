@@ -1,29 +1,132 @@
+import heapq
+import itertools
 import threading
 import time
 from collections import OrderedDict
 from threading import Lock, RLock, Condition
-from typing import Dict, Optional, Any
+from typing import Dict, Iterator, List, Optional, Any, Tuple
 import concurrent.futures
 import random
 
+
+class PriorityWaiter:
+    """A thread parked in PriorityLock.acquire until the lock is handed to it."""
+    def __init__(self):
+        self.parker = Lock()
+        self.parker.acquire()  # Released by the thread that hands over the lock
+        self.granted = False
+        self.cancelled = False
+
+
+class PriorityLock:
+    """
+    Mutex that grants waiters in priority-then-FIFO order (lower priority value
+    first) and gives up at an absolute deadline. acquire() spins briefly before
+    parking, since the cache's critical sections are short. Once threads are
+    parked, new arrivals queue behind them instead of barging.
+    """
+    
+    def __init__(self, spin_count: int = 20):
+        self.spin_count = spin_count
+        self._mutex = Lock()  # Guards all fields below
+        self._locked = False
+        self._waiters: List[Tuple[int, int, PriorityWaiter]] = []
+        self._seq = itertools.count()
+        self.acquisitions = 0
+        self.timeouts = 0
+    
+    def _try_acquire_locked(self) -> bool:
+        """Take the lock if it is free and nobody is queued. Caller holds _mutex."""
+        if self._locked or self._waiters:
+            return False
+        self._locked = True
+        self.acquisitions += 1
+        return True
+    
+    def acquire(self, priority: int = 0, deadline: Optional[float] = None) -> bool:
+        """
+        Acquire the lock, waiting until deadline (a time.monotonic() value, or
+        None to wait forever). Returns False if the deadline passed first.
+        """
+        # Spin phase: yield the GIL and retry while no one is parked
+        for _ in range(self.spin_count):
+            with self._mutex:
+                if self._try_acquire_locked():
+                    return True
+                if self._waiters:
+                    break
+            if deadline is not None and time.monotonic() >= deadline:
+                break
+            time.sleep(0)
+        
+        # Park phase
+        with self._mutex:
+            if self._try_acquire_locked():
+                return True
+            if deadline is not None and time.monotonic() >= deadline:
+                self.timeouts += 1
+                return False
+            waiter = PriorityWaiter()
+            heapq.heappush(self._waiters, (priority, next(self._seq), waiter))
+        
+        timeout = -1 if deadline is None else max(0.0, deadline - time.monotonic())
+        if waiter.parker.acquire(timeout=timeout):
+            return True
+        
+        with self._mutex:
+            # The lock may have been handed over just as the wait timed out
+            if waiter.granted:
+                return True
+            waiter.cancelled = True
+            self.timeouts += 1
+            return False
+    
+    def release(self) -> None:
+        """Hand the lock directly to the first live waiter, or unlock it."""
+        with self._mutex:
+            while self._waiters:
+                _, _, waiter = heapq.heappop(self._waiters)
+                if waiter.cancelled:
+                    continue
+                waiter.granted = True
+                self.acquisitions += 1
+                waiter.parker.release()
+                return
+            self._locked = False
+    
+    def stats(self) -> Dict[str, int]:
+        """Acquisitions granted and attempts that hit their deadline."""
+        with self._mutex:
+            return {"acquisitions": self.acquisitions, "timeouts": self.timeouts}
+
+
 class TimeoutLRUCache:
     """
-    LRU Cache with timeout-based locking to prevent deadlocks.
+    LRU Cache with deadline-based locking to prevent deadlocks.
+    Each call may pass an absolute deadline (time.monotonic()) and a priority;
+    waiters are served in priority-then-FIFO order, lower values first.
+    Calls without a deadline wait at most timeout seconds.
     """
     
-    def __init__(self, capacity: int, timeout: float = 1.0):
+    def __init__(self, capacity: int, timeout: float = 1.0, spin_count: int = 20):
         if capacity <= 0:
             raise ValueError("Capacity must be positive")
         
         self.capacity = capacity
         self.cache = OrderedDict()
-        self.lock = Lock()
+        self.lock = PriorityLock(spin_count)
         self.timeout = timeout
     
-    def get(self, key: int) -> int:
-        """Get value with timeout lock."""
-        if not self.lock.acquire(timeout=self.timeout):
+    def _acquire(self, deadline: Optional[float], priority: int) -> None:
+        """Acquire the lock or raise TimeoutError."""
+        if deadline is None:
+            deadline = time.monotonic() + self.timeout
+        if not self.lock.acquire(priority, deadline):
             raise TimeoutError("Failed to acquire lock within timeout")
+    
+    def get(self, key: int, deadline: Optional[float] = None, priority: int = 0) -> int:
+        """Get value with deadline lock."""
+        self._acquire(deadline, priority)
         
         try:
             if key not in self.cache:
@@ -35,10 +138,10 @@ class TimeoutLRUCache:
         finally:
             self.lock.release()
     
-    def put(self, key: int, value: int) -> None:
-        """Put value with timeout lock."""
-        if not self.lock.acquire(timeout=self.timeout):
-            raise TimeoutError("Failed to acquire lock within timeout")
+    def put(self, key: int, value: int, deadline: Optional[float] = None,
+            priority: int = 0) -> None:
+        """Put value with deadline lock."""
+        self._acquire(deadline, priority)
         
         try:
             if key in self.cache:
@@ -51,12 +154,40 @@ class TimeoutLRUCache:
         finally:
             self.lock.release()
     
-    def get_all(self) -> Dict[int, int]:
-        """Get all with timeout lock."""
-        if not self.lock.acquire(timeout=self.timeout):
-            raise TimeoutError("Failed to acquire lock within timeout")
+    def get_all(self, deadline: Optional[float] = None, priority: int = 0) -> Dict[int, int]:
+        """Get all with deadline lock."""
+        self._acquire(deadline, priority)
         
         try:
             return dict(self.cache)
         finally:
             self.lock.release()
+    
+    def iter_items(self, chunk_size: int = 1000, priority: int = 0) -> Iterator[Tuple[int, int]]:
+        """
+        Yield key-value pairs, taking the lock once per chunk with the default timeout.
+        Weakly consistent: keys present at the start are yielded unless removed
+        before their chunk is read; keys added during the scan are not yielded.
+        The keys are copied once up front because an OrderedDict iterator
+        cannot resume after the dict changes.
+        """
+        self._acquire(None, priority)
+        
+        try:
+            keys = list(self.cache)
+        finally:
+            self.lock.release()
+        
+        for start in range(0, len(keys), chunk_size):
+            self._acquire(None, priority)
+            
+            try:
+                chunk = [(key, self.cache[key])
+                         for key in keys[start:start + chunk_size] if key in self.cache]
+            finally:
+                self.lock.release()
+            yield from chunk
+    
+    def lock_stats(self) -> Dict[str, int]:
+        """Lock acquisitions granted and attempts that hit their deadline."""
+        return self.lock.stats()
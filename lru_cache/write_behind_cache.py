@@ -0,0 +1,150 @@
+import logging
+import threading
+import time
+from threading import Lock, Condition
+from typing import Callable, Dict, Optional
+
+from thread_safe_lru_cache import ThreadSafeLRUCache
+
+logger = logging.getLogger(__name__)
+
+
+class WriteBehindLRUCache(ThreadSafeLRUCache):
+    """
+    Thread-safe LRU Cache that writes to a backing store asynchronously.
+    put() only marks the entry dirty; a background flusher hands batches of
+    at most batch_size dirty entries to store(batch). Repeated writes to a key
+    before a flush are coalesced, and evicting a dirty entry does not drop its
+    pending write: get() keeps returning it until the store call that writes
+    it has returned. remove() discards the pending write but does not delete
+    the key from the store.
+    """
+
+    def __init__(self, capacity: int, store: Callable[[Dict[int, int]], None],
+                 flush_interval: float = 0.1, batch_size: int = 100,
+                 max_backoff: float = 5.0):
+        super().__init__(capacity)
+
+        self.store = store
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        self.dirty: Dict[int, int] = {}  # key -> latest unflushed value
+        self.in_flight: Dict[int, int] = {}  # key -> value being written by flush()
+        self.dirty_ready = Condition(self.lock)
+        self.flush_lock = Lock()  # Keeps batches reaching the store in order
+        self.closed = False
+        # Failed store calls: retried after an exponential backoff capped at max_backoff
+        self.max_backoff = max_backoff
+        self.flush_errors = 0
+        self.last_error: Optional[Exception] = None
+
+        self.flusher = threading.Thread(target=self._flush_loop, daemon=True)
+        self.flusher.start()
+
+    def get(self, key: int) -> int:
+        """Get value by key, falling back to writes not yet flushed."""
+        value = super().get(key)
+        if value != -1:
+            return value
+
+        with self.lock:
+            if key in self.dirty:
+                return self.dirty[key]
+            return self.in_flight.get(key, -1)
+
+    def put(self, key: int, value: int) -> None:
+        """Put key-value pair and mark it dirty for the flusher."""
+        with self.lock:
+            evicted = self._put_locked(key, value)
+            self.dirty[key] = value
+            if len(self.dirty) >= self.batch_size:
+                self.dirty_ready.notify()
+
+        if evicted is not None:
+            self._notify(*evicted, "evicted")
+
+    def remove(self, key: int) -> bool:
+        """
+        Remove key and discard its pending write. Returns True if the key was
+        cached or still had a pending write after being evicted.
+        """
+        with self.lock:
+            if key not in self.cache:
+                pending = key in self.dirty or key in self.in_flight
+                self.dirty.pop(key, None)
+                self.in_flight.pop(key, None)
+                return pending
+            value = self._remove_locked(key)
+
+        self._notify(key, value, "removed")
+        return True
+
+    def _remove_locked(self, key: int) -> int:
+        self.dirty.pop(key, None)
+        self.in_flight.pop(key, None)
+        return super()._remove_locked(key)
+
+    def flush(self) -> None:
+        """
+        Write all dirty entries to the store in batches of at most batch_size.
+        The store is called without the cache lock; entries stay readable
+        through in_flight until their batch has been written.
+        """
+        with self.flush_lock:
+            with self.lock:
+                dirty, self.dirty = self.dirty, {}
+                self.in_flight = dict(dirty)
+
+            items = list(dirty.items())
+            for start in range(0, len(items), self.batch_size):
+                batch = items[start:start + self.batch_size]
+                try:
+                    self.store(dict(batch))
+                except Exception:
+                    # Requeue what was not written unless it was overwritten or removed meanwhile
+                    with self.lock:
+                        for key, value in items[start:]:
+                            if key in self.in_flight:
+                                self.dirty.setdefault(key, value)
+                        self.in_flight = {}
+                    raise
+                with self.lock:
+                    for key, _ in batch:
+                        self.in_flight.pop(key, None)
+
+    def _flush_loop(self) -> None:
+        """Flush every flush_interval, or earlier once batch_size keys are dirty."""
+        failures = 0
+        while True:
+            with self.lock:
+                if failures:
+                    # Back off even if the batch threshold is already met
+                    retry_at = time.monotonic() + min(
+                        self.max_backoff, self.flush_interval * 2 ** (failures - 1))
+                    while not self.closed:
+                        remaining = retry_at - time.monotonic()
+                        if remaining <= 0:
+                            break
+                        self.dirty_ready.wait(remaining)
+                elif not self.closed and len(self.dirty) < self.batch_size:
+                    self.dirty_ready.wait(self.flush_interval)
+                closed = self.closed
+
+            try:
+                self.flush()
+                failures = 0
+            except Exception as error:
+                failures += 1
+                self.flush_errors += 1
+                self.last_error = error
+                logger.exception("Write-behind flush failed (%d in a row)", failures)
+
+            if closed:
+                return
+
+    def close(self) -> None:
+        """Stop the flusher after a final flush."""
+        with self.lock:
+            self.closed = True
+            self.dirty_ready.notify()
+        self.flusher.join()